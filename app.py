@@ -11,6 +11,11 @@ from oauth2client.service_account import ServiceAccountCredentials
 import tempfile
 import plotly.io as pio
 import io
+import os
+import numpy as np
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 trading_tips_list = [
     "Always trade with a stop loss — discipline protects your capital.",
@@ -36,9 +41,19 @@ trading_tips_list = [
 ]
 
 
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+# الصور الثابتة بتتخدم من مجلد static ومعاها رقم نسخة بيتغير لو الملف اتغير
+# (الوضع الداكن نفسه متعرف في .streamlit/config.toml)
+@st.cache_resource(show_spinner=False)
+def static_asset_url(filename):
+    with open(os.path.join(STATIC_DIR, filename), "rb") as f:
+        version = sha256(f.read()).hexdigest()[:12]
+    return f"app/static/{filename}?v={version}"
+
 st.set_page_config(
     page_title="Trading Journal",
-    page_icon="https://raw.githubusercontent.com/ahmedgamalka/my-dashboard/refs/heads/main/favicon.ico"
+    page_icon=static_asset_url("favicon.ico")
 )
 
 # الاتصال بجوجل شيت
@@ -49,14 +64,18 @@ def connect_gsheet():
     client = gspread.authorize(creds)
     return client
 
-# الوضع الداكن
-def set_dark_theme():
-    st.markdown("""
-        <style>
-        body {background-color: #0E1117; color: white;}
-        .stApp {background-color: #0E1117;}
-        </style>
-    """, unsafe_allow_html=True)
+# ستايل صفحة الدخول والسايدبار
+APP_CSS = """
+<style>
+.center-logo {display: flex; justify-content: center; align-items: center; margin-bottom: 20px;}
+.center-logo img {max-width: 150px; height: auto;}
+.sidebar-logo img {width: 50px; height: auto;}
+.sidebar-footer {position: fixed; bottom: 20px; text-align: left; font-size: 16px; color: white;}
+</style>
+"""
+
+def inject_stylesheet():
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 # تشفير كلمة المرور
 def hash_password(password):
@@ -68,23 +87,7 @@ def verify_password(password, hashed):
 # صفحة تسجيل الدخول وإنشاء حساب
 def login_signup():
     st.markdown(
-        f"""
-        <style>
-        .center-logo {{
-            display: flex;
-            justify-content: center;
-            align-items: center;
-            margin-bottom: 20px;
-        }}
-        .center-logo img {{
-            max-width: 150px;
-            height: auto;
-        }}
-        </style>
-        <div class='center-logo'>
-            <img src='https://raw.githubusercontent.com/ahmedgamalka/my-dashboard/refs/heads/main/logo.png' alt='Logo'>
-        </div>
-        """, 
+        f"<div class='center-logo'><img src='{static_asset_url('logo.png')}' alt='Logo'></div>",
         unsafe_allow_html=True
     )
     st.markdown("<h1 style='text-align: center; color: white;'>Trading Risk Management & Journal</h1>", unsafe_allow_html=True)
@@ -132,6 +135,84 @@ def login_signup():
                 st.warning("Username does not exist.")
 
 
+# الإعدادات الافتراضية لكل بروفايل مخاطرة
+SETTINGS_DEFAULTS = {
+    "commission_per_share": 0.02,
+    "min_commission": 3.98,
+    "default_risk_pct": 2.0,
+    "cash_buffer_pct": 1.0,
+}
+SETTINGS_HEADERS = ["username", "profile", "is_active"] + list(SETTINGS_DEFAULTS)
+
+def open_settings_sheet(client):
+    try:
+        return client.open("Trading_Users_DB").worksheet("Settings")
+    except gspread.exceptions.WorksheetNotFound:
+        sheet = client.open("Trading_Users_DB").add_worksheet(title="Settings", rows="1000", cols=str(len(SETTINGS_HEADERS)))
+        sheet.append_row(SETTINGS_HEADERS)
+        return sheet
+
+# تحميل إعدادات المستخدم مرة واحدة في الجلسة
+def load_user_settings(user):
+    settings = st.session_state.get("user_settings")
+    if settings and settings["user"] == user:
+        return settings
+
+    profiles, active = {}, None
+    for record in open_settings_sheet(connect_gsheet()).get_all_records():
+        if record["username"] != user:
+            continue
+        name = str(record["profile"])
+        profiles[name] = {
+            key: float(record[key]) if record.get(key, "") != "" else default
+            for key, default in SETTINGS_DEFAULTS.items()
+        }
+        if str(record["is_active"]).upper() == "TRUE":
+            active = name
+
+    # لو المستخدم ملوش إعدادات محفوظة، البروفايل الافتراضي لسه ما اتكتبش في الشيت
+    saved = bool(profiles)
+    if not profiles:
+        profiles = {"Default": dict(SETTINGS_DEFAULTS)}
+
+    settings = {"user": user, "profiles": profiles, "active": active or next(iter(profiles))}
+    settings["saved"] = settings_snapshot(settings) if saved else {}
+    st.session_state["user_settings"] = settings
+    return settings
+
+def settings_snapshot(settings):
+    return {
+        name: [name == settings["active"]] + [values[key] for key in SETTINGS_DEFAULTS]
+        for name, values in settings["profiles"].items()
+    }
+
+# حفظ البروفايلات اللي اتغيرت بس
+def save_user_settings(user, settings):
+    current = settings_snapshot(settings)
+    changed = {name: row for name, row in current.items() if settings["saved"].get(name) != row}
+    if not changed:
+        return False
+
+    sheet = open_settings_sheet(connect_gsheet())
+    row_numbers = {
+        str(record["profile"]): i + 2
+        for i, record in enumerate(sheet.get_all_records())
+        if record["username"] == user
+    }
+
+    new_rows = []
+    for name, row in changed.items():
+        values = [user, name] + row
+        if name in row_numbers:
+            sheet.update(range_name=f"A{row_numbers[name]}", values=[values])
+        else:
+            new_rows.append(values)
+    if new_rows:
+        sheet.append_rows(new_rows)
+
+    settings["saved"] = current
+    return True
+
 # تمييز الصفوف المهمة
 def highlight_rows(row):
     highlight = "background-color: yellow; color: black"
@@ -146,11 +227,16 @@ def risk_management_page():
     # إدخال رصيد الحساب فقط
     acc_bal = st.number_input("Account Balance ($)", min_value=0.0, value=1000.0, step=100.0)
 
-    # استخدام الإعدادات من session_state
-    commission = st.session_state.get("commission_per_share", 0.02)
-    min_commission = st.session_state.get("min_commission", 3.98)
-    risk_pct = st.session_state.get("default_risk_pct", 2.0) / 100
-    buffer_pct = st.session_state.get("cash_buffer_pct", 1.0) / 100
+    # استخدام إعدادات بروفايل المخاطرة المحفوظ للمستخدم
+    settings = load_user_settings(st.session_state["username"])
+    profile_names = list(settings["profiles"])
+    profile_name = st.selectbox("Risk Profile", profile_names, index=profile_names.index(settings["active"]))
+    profile = settings["profiles"][profile_name]
+
+    commission = profile["commission_per_share"]
+    min_commission = profile["min_commission"]
+    risk_pct = profile["default_risk_pct"] / 100
+    buffer_pct = profile["cash_buffer_pct"] / 100
 
     # عرض القيم الحالية للمستخدم
     st.info(f"Commission Per Share: ${commission} - | - Minimum Commission: ${min_commission} - | - Risk % per trade: {risk_pct*100}% - | - Reserved Cash Buffer: {buffer_pct*100}%")
@@ -223,6 +309,75 @@ def risk_management_page():
             st.warning(f"⚠️ The actual R/R ratio is {actual_rr:.2f}, which is below 1.0.")
 
 
+# أعمدة شيت الجورنال
+JOURNAL_HEADERS = [
+    "Trade ID", "Ticker Symbol", "Trade Direction", "Entry Price", "Entry Time", 
+    "Exit Price", "Exit Time", "Position Size", "Risk", "Trade SL", "Target", 
+    "R Multiple", "Commission", "Net P&L", "Used Indicator", "Used Strategy", "Notes"
+]
+
+def calculate_trade_metrics(entry, exit_price, size, stop, commission):
+    risk_val = abs(entry - stop) * size
+    net_pnl = ((exit_price - entry) * size) - commission
+    r_multiple = net_pnl / risk_val if risk_val > 0 else 0
+    return risk_val, net_pnl, r_multiple
+
+# تعديلات الجورنال: كل عملية بتلمس صف واحد بس، وبتدور على الصف برقم الصفقة
+# وقت التنفيذ، فلو الجورنال اتغير من جلسة تانية التعديل بيتطبق على آخر نسخة
+class JournalConflict(Exception):
+    pass
+
+# قفل لكل مستخدم مشترك بين كل الجلسات على نفس السيرفر
+@st.cache_resource
+def journal_lock(user):
+    return threading.Lock()
+
+def next_trade_id(trade_ids):
+    return max((int(t) for t in trade_ids[1:] if str(t).isdigit()), default=0) + 1
+
+def append_trade_to_gsheet(user, sheet, trade_row):
+    with journal_lock(user):
+        trade_id = next_trade_id(sheet.col_values(1))
+        response = sheet.append_row([trade_id] + trade_row)
+        updated_range = response["updates"]["updatedRange"].split("!")[-1]
+        row_number = gspread.utils.a1_to_rowcol(updated_range.split(":")[0])[0]
+
+        # سيرفر تاني ممكن ياخد نفس الرقم في نفس اللحظة: الصف الأقدم بيحتفظ بالرقم
+        # وصفنا بياخد رقم جديد، والرقم الجديد لازم ما يتكررش في أي صف تاني خالص
+        trade_ids = sheet.col_values(1)
+        others = trade_ids[:row_number - 1]
+        while str(trade_id) in others:
+            trade_id = next_trade_id(trade_ids)
+            sheet.update(range_name=f"A{row_number}", values=[[trade_id]])
+            trade_ids = sheet.col_values(1)
+            others = trade_ids[:row_number - 1] + trade_ids[row_number:]
+    return trade_id
+
+# تعديل صفقة في مكانها، بشرط إن الصف ما اتغيرش من ساعة ما المستخدم فتحه
+def update_trade_in_gsheet(user, sheet, original, updated):
+    with journal_lock(user):
+        trade_ids = sheet.col_values(1)
+        trade_key = str(original["Trade ID"])
+        if trade_key not in trade_ids:
+            raise JournalConflict(f"Trade {trade_key} was deleted in another session.")
+        row_number = trade_ids.index(trade_key) + 1
+
+        current = gspread.utils.numericise_all(sheet.row_values(row_number))
+        current += [""] * (len(JOURNAL_HEADERS) - len(current))
+        if current not in ([original.get(h, "") for h in JOURNAL_HEADERS], updated):
+            raise JournalConflict(f"Trade {trade_key} was changed in another session.")
+
+        sheet.update(range_name=f"A{row_number}", values=[updated])
+
+# دالة حذف الصفقة من Google Sheets (صف واحد بدل مسح الشيت وإعادة كتابته)
+def delete_trade_from_gsheet(user, sheet, trade_id):
+    with journal_lock(user):
+        trade_ids = sheet.col_values(1)
+        if str(trade_id) not in trade_ids:
+            return False  # اتحذفت بالفعل من جلسة تانية
+        sheet.delete_rows(trade_ids.index(str(trade_id)) + 1)
+        return True
+
 # صفحة إضافة صفقة جديدة
 def add_trade_page():
     st.header("➕ Add Trade")
@@ -234,11 +389,7 @@ def add_trade_page():
             sheet = client.open("Trading_Journal_Master").worksheet(user)
         except gspread.exceptions.WorksheetNotFound:
             sheet = client.open("Trading_Journal_Master").add_worksheet(title=user, rows="1000", cols="21")
-            sheet.append_row([
-                "Trade ID", "Ticker Symbol", "Trade Direction", "Entry Price", "Entry Time", 
-                "Exit Price", "Exit Time", "Position Size", "Risk", "Trade SL", "Target", 
-                "R Multiple", "Commission", "Net P&L", "Used Indicator", "Used Strategy", "Notes"
-            ])
+            sheet.append_row(JOURNAL_HEADERS)
 
         ticker = st.text_input("Ticker Symbol")
         entry = st.number_input("Entry Price", step=0.1)
@@ -252,25 +403,26 @@ def add_trade_page():
         notes = st.text_area("Notes")
 
         if st.button("Save Trade"):
-            risk_val = abs(entry - stop) * size
-            net_pnl = ((exit_price - entry) * size) - commission
-            r_multiple = net_pnl / risk_val if risk_val > 0 else 0
-
-            # Get current max Trade ID
-            records = sheet.get_all_records()
-            if records:
-                trade_id = max(r["Trade ID"] for r in records) + 1
-            else:
-                trade_id = 1
+            risk_val, net_pnl, r_multiple = calculate_trade_metrics(entry, exit_price, size, stop, commission)
 
             trade_row = [
-                trade_id, ticker, "Long", entry, 
+                ticker, "Long", entry, 
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"), exit_price,
                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"), size, risk_val, stop, target,
                 r_multiple, commission, net_pnl, used_indicator, used_strategy, notes
             ]
 
-            sheet.append_row(trade_row)
+            # رقم الصفقة بيتحدد جوه القفل عشان ما يتكررش مع جلسة تانية
+            trade_id = append_trade_to_gsheet(user, sheet, trade_row)
+            trade_row = [trade_id] + trade_row
+
+            # تحديث مكعب الأداء بالصفقة الجديدة بدل إعادة بنائه
+            cube_key = f"perf_cube_{user}"
+            if cube_key in st.session_state:
+                st.session_state[cube_key] = update_performance_cube(
+                    st.session_state[cube_key], dict(zip(JOURNAL_HEADERS, trade_row))
+                )
+
             st.success(f"✅ Trade {trade_id} added to journal!")
 
 
@@ -280,22 +432,6 @@ from fpdf import FPDF
 import streamlit as st
 import pandas as pd
 
-# دالة حذف الصفقة من Google Sheets
-def delete_trade_from_gsheet(user, trade_id):
-    client = connect_gsheet()
-    sheet = client.open("Trading_Journal_Master").worksheet(user)
-    all_data = sheet.get_all_records()
-    df_all = pd.DataFrame(all_data)
-
-    # حذف الصف من الداتا فريم
-    df_new = df_all[df_all["Trade ID"] != trade_id]
-
-    # مسح الشيت وكتابة البيانات الجديدة
-    sheet.clear()
-    sheet.append_row(list(df_new.columns))
-    for _, record in df_new.iterrows():
-        sheet.append_row(record.tolist())
-
 # دالة تصدير الجورنال كـ PDF
 def export_journal_to_pdf(filtered_df, user):
     pdf = FPDF()
@@ -340,7 +476,8 @@ def trade_journal_page():
         user = st.session_state["username"]
         try:
             sheet = client.open("Trading_Journal_Master").worksheet(user)
-            df = pd.DataFrame(sheet.get_all_records())
+            records = sheet.get_all_records()
+            df = pd.DataFrame(records)
         except gspread.exceptions.WorksheetNotFound:
             st.warning("⚠️ No trades found for this user.")
             return
@@ -357,6 +494,39 @@ def trade_journal_page():
             with open(pdf_file, "rb") as f:
                 st.download_button(label="Download PDF", data=f, file_name=pdf_file, mime="application/pdf")
 
+        # تعديل صفقة في مكانها (تحديث صف واحد)
+        st.subheader("✏️ Edit Trade:")
+        edit_id = st.selectbox("Trade ID", df["Trade ID"].tolist(), key="edit_trade_id")
+        original = next(r for r in records if r["Trade ID"] == edit_id)
+        with st.form(f"edit_trade_{edit_id}"):
+            ticker = st.text_input("Ticker Symbol", value=str(original["Ticker Symbol"]))
+            entry = st.number_input("Entry Price", value=float(original["Entry Price"]), step=0.1)
+            exit_price = st.number_input("Exit Price", value=float(original["Exit Price"]), step=0.1)
+            size = st.number_input("Position Size", min_value=1, value=max(int(original["Position Size"]), 1), step=1)
+            stop = st.number_input("Stop Loss Price", value=float(original["Trade SL"]), step=0.1)
+            target = st.number_input("Target Price", value=float(original["Target"]), step=0.1)
+            commission = st.number_input("Total Commission ($)", value=float(original["Commission"]), step=0.01)
+            used_indicator = st.text_input("Used Indicator", value=str(original["Used Indicator"]))
+            used_strategy = st.text_input("Used Strategy", value=str(original["Used Strategy"]))
+            notes = st.text_area("Notes", value=str(original["Notes"]))
+            save_edit = st.form_submit_button("💾 Save Changes")
+
+        if save_edit:
+            risk_val, net_pnl, r_multiple = calculate_trade_metrics(entry, exit_price, size, stop, commission)
+            updated = [
+                original["Trade ID"], ticker, original["Trade Direction"], entry,
+                original["Entry Time"], exit_price, original["Exit Time"], size, risk_val, stop, target,
+                r_multiple, commission, net_pnl, used_indicator, used_strategy, notes
+            ]
+            try:
+                update_trade_in_gsheet(user, sheet, original, updated)
+            except JournalConflict as e:
+                st.error(f"⚠️ {e} Reload the journal and try again.")
+            else:
+                st.session_state.pop(f"perf_cube_{user}", None)
+                st.success(f"✅ Updated trade with ID: {edit_id}")
+                st.rerun()
+
         # حذف الصفقة
         st.subheader("🗑️ Delete Trades:")
         for idx, row in df.iterrows():
@@ -369,16 +539,14 @@ def trade_journal_page():
             trade_id = st.session_state.trade_id_to_delete
             st.warning(f"Are you sure you want to delete trade ID: {trade_id}?")
             if st.button("✅ Confirm Delete", key="confirm_delete_button"):
-                all_data = sheet.get_all_records()
-                df_all = pd.DataFrame(all_data)
-                df_new = df_all[df_all["Trade ID"] != trade_id]
-                sheet.clear()
-                sheet.append_row(list(df_new.columns))
-                for i, record in df_new.iterrows():
-                    sheet.append_row(record.tolist())
-                st.success(f"✅ Deleted trade with ID: {trade_id}")
+                deleted = delete_trade_from_gsheet(user, sheet, trade_id)
+                st.session_state.pop(f"perf_cube_{user}", None)
                 del st.session_state.trade_id_to_delete
-                st.rerun()   # ✅ استخدم st.rerun() هنا خارج اللوب!
+                if deleted:
+                    st.success(f"✅ Deleted trade with ID: {trade_id}")
+                    st.rerun()   # ✅ استخدم st.rerun() هنا خارج اللوب!
+                else:
+                    st.warning(f"⚠️ Trade ID {trade_id} was already deleted in another session — nothing was deleted.")
 
 import plotly.io as pio
 
@@ -445,25 +613,65 @@ def export_dashboard_summary_to_pdf(summary, user, filtered_df, fig_equity, fig_
     pdf.output(pdf_file, "F")
     return pdf_file
 
-def generate_strategy_performance(df):
-    if "Used Strategy" not in df.columns:
-        return None, None
-
-    df["Used Strategy"] = df["Used Strategy"].fillna("Unknown")
-
-    grouped = df.groupby("Used Strategy")
-    
-    strategy_stats = grouped[["Net P&L", "R Multiple"]].agg({
-        "Net P&L": "sum",
-        "R Multiple": "mean"
-    }).rename(columns={
-        "Net P&L": "Total_PnL",
-        "R Multiple": "Avg_R"
-    })
-
-    strategy_stats["Trades"] = grouped.size()
-    strategy_stats["WinRate"] = grouped["Net P&L"].apply(lambda x: (x > 0).mean() * 100)
-    strategy_stats = strategy_stats.reset_index()
+# مكعب الأداء (شهر × استراتيجية × سهم × مؤشر)
+CUBE_DIMENSIONS = ["Month", "Used Strategy", "Ticker Symbol", "Used Indicator"]
+CUBE_MEASURES = ["Total_PnL", "Trades", "Wins", "Sum_R", "R_Count"]
+
+def build_performance_cube(df):
+    trades = pd.DataFrame(index=df.index)
+    entry_time = pd.to_datetime(df["Entry Time"], errors="coerce") if "Entry Time" in df.columns else pd.Series(pd.NaT, index=df.index)
+    trades["Month"] = entry_time.dt.strftime("%Y-%m").fillna("Unknown")
+    for dim in CUBE_DIMENSIONS[1:]:
+        values = df[dim] if dim in df.columns else pd.Series("Unknown", index=df.index)
+        trades[dim] = values.replace("", "Unknown").fillna("Unknown").astype(str)
+
+    pnl = pd.to_numeric(df["Net P&L"], errors="coerce") if "Net P&L" in df.columns else pd.Series(0.0, index=df.index)
+    r_multiple = pd.to_numeric(df["R Multiple"], errors="coerce") if "R Multiple" in df.columns else pd.Series(0.0, index=df.index)
+    trades["Total_PnL"] = pnl.fillna(0.0)
+    trades["Trades"] = 1
+    trades["Wins"] = (pnl > 0).astype(int)
+    trades["Sum_R"] = r_multiple.fillna(0.0)
+    trades["R_Count"] = r_multiple.notna().astype(int)
+
+    return trades.groupby(CUBE_DIMENSIONS, as_index=False, dropna=False)[CUBE_MEASURES].sum()
+
+def update_performance_cube(cube, trade):
+    cell = build_performance_cube(pd.DataFrame([trade]))
+    merged = pd.concat([cube, cell], ignore_index=True)
+    return merged.groupby(CUBE_DIMENSIONS, as_index=False, dropna=False)[CUBE_MEASURES].sum()
+
+# المكعب بيتبني مرة واحدة في الجلسة، وبيتعاد بناؤه لو محتوى الجورنال اتغير من جلسة تانية
+def get_performance_cube(user, load_trades, fingerprint=None):
+    cube_key = f"perf_cube_{user}"
+    fingerprint_key = f"perf_cube_fingerprint_{user}"
+    cube = st.session_state.get(cube_key)
+    if cube is None or (fingerprint is not None and st.session_state.get(fingerprint_key) != fingerprint):
+        cube = build_performance_cube(load_trades())
+        st.session_state[cube_key] = cube
+        st.session_state[fingerprint_key] = fingerprint
+    return cube
+
+def journal_fingerprint(journal):
+    return int(pd.util.hash_pandas_object(journal, index=False).sum())
+
+def covers_whole_months(start_date, end_date):
+    ends_on_month_end = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).day == 1
+    return start_date.day == 1 and (ends_on_month_end or end_date >= datetime.now().date())
+
+def query_cube(cube, dims, filters=None):
+    cells = cube
+    for dim, values in (filters or {}).items():
+        if values:
+            cells = cells[cells[dim].isin(values)]
+
+    stats = cells.groupby(dims, as_index=False, dropna=False)[CUBE_MEASURES].sum()
+    stats["WinRate"] = stats["Wins"] / stats["Trades"] * 100
+    stats["Avg_R"] = stats["Sum_R"] / stats["R_Count"]
+    return stats
+
+def generate_strategy_performance(cube):
+    strategy_stats = query_cube(cube, ["Used Strategy"])
+    strategy_stats = strategy_stats[["Used Strategy", "Total_PnL", "Avg_R", "Trades", "WinRate"]]
 
     fig = px.bar(
         strategy_stats,
@@ -477,25 +685,9 @@ def generate_strategy_performance(df):
     return strategy_stats, fig
 
 
-def generate_monthly_performance(df):
-    if "Entry Time" not in df.columns or "Net P&L" not in df.columns:
-        return None, None
-
-    df["Entry Time"] = pd.to_datetime(df["Entry Time"], errors="coerce")
-    df["Month"] = df["Entry Time"].dt.to_period("M").astype(str)
-
-    grouped = df.groupby("Month")
-    monthly_stats = grouped[["Net P&L", "R Multiple"]].agg({
-        "Net P&L": "sum",
-        "R Multiple": "mean"
-    }).rename(columns={
-        "Net P&L": "Total_PnL",
-        "R Multiple": "Avg_R"
-    })
-
-    monthly_stats["Total_Trades"] = grouped.size()
-    monthly_stats["WinRate"] = grouped["Net P&L"].apply(lambda x: (x > 0).mean() * 100)
-    monthly_stats = monthly_stats.reset_index()
+def generate_monthly_performance(cube):
+    monthly_stats = query_cube(cube, ["Month"]).rename(columns={"Trades": "Total_Trades"})
+    monthly_stats = monthly_stats[["Month", "Total_PnL", "Avg_R", "Total_Trades", "WinRate"]]
 
     fig = px.bar(
         monthly_stats,
@@ -509,6 +701,56 @@ def generate_monthly_performance(df):
     return monthly_stats, fig
 
 
+# تقليل نقاط الرسوم الكبيرة قبل إرسالها للمتصفح
+CHART_POINT_BUDGET = 1500
+
+def lttb_indices(x, y, threshold):
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    bucket_size = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * bucket_size).astype(int) + 1
+    edges[-1] = n - 1
+    indices = np.empty(threshold, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+
+    return indices
+
+def downsample_series(df, x_col, y_col, budget=CHART_POINT_BUDGET):
+    if len(df) <= budget:
+        return df
+
+    x = pd.to_datetime(df[x_col], errors="coerce").astype("int64").to_numpy(dtype=float)
+    y = df[y_col].to_numpy(dtype=float)
+    y_filled = np.nan_to_num(y, nan=0.0)
+
+    # نحافظ دايماً على القمة والقاع وأكبر تراجع (Drawdown) حتى لو LTTB تجاهلهم
+    trough = int(np.argmin(y_filled - np.maximum.accumulate(y_filled)))
+    peak = int(np.argmax(y_filled[:trough + 1]))
+    extremes = [int(np.argmin(y_filled)), int(np.argmax(y_filled)), trough, peak]
+
+    keep = np.union1d(lttb_indices(x, y_filled, budget), extremes)
+    return df.iloc[keep]
+
+def equity_curve_figure(df, budget=CHART_POINT_BUDGET):
+    points = downsample_series(df, "Entry Time", "Cumulative PnL", budget)
+    title = "Cumulative Net P&L Over Time"
+    if len(points) < len(df):
+        title += f" ({len(points)} of {len(df)} points)"
+    return px.line(points, x="Entry Time", y="Cumulative PnL", title=title)
+
+
 # صفحة الداشبورد
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
@@ -532,6 +774,8 @@ def dashboard_page():
 
         df["Entry Time"] = pd.to_datetime(df["Entry Time"], errors="coerce")
         df["Net P&L"] = pd.to_numeric(df["Net P&L"], errors="coerce")
+        journal = df
+        journal_cube = get_performance_cube(user, lambda: journal, fingerprint=journal_fingerprint(journal))
         df = df.dropna(subset=["Entry Time"])
 
     st.markdown("### 📅 Filter by Date Range")
@@ -572,11 +816,33 @@ def dashboard_page():
 
     st.subheader("📈 Equity Curve")
     filtered['Cumulative PnL'] = filtered["Net P&L"].cumsum()
-    fig_equity = px.line(filtered, x="Entry Time", y="Cumulative PnL", title="Cumulative Net P&L Over Time")
+    fig_equity = equity_curve_figure(filtered)
     st.plotly_chart(fig_equity)
 
+    # تكبير جزء من المنحنى بدقة أعلى بدل إرسال كل النقاط مرة واحدة
+    if len(filtered) > CHART_POINT_BUDGET:
+        first_time = filtered["Entry Time"].min().to_pydatetime()
+        last_time = filtered["Entry Time"].max().to_pydatetime()
+        zoom_start, zoom_end = st.slider(
+            "🔍 Zoom Equity Curve", min_value=first_time, max_value=last_time,
+            value=(first_time, last_time), format="YYYY-MM-DD"
+        )
+        if (zoom_start, zoom_end) != (first_time, last_time):
+            zoomed = filtered[(filtered["Entry Time"] >= zoom_start) & (filtered["Entry Time"] <= zoom_end)]
+            if not zoomed.empty:
+                st.plotly_chart(equity_curve_figure(zoomed))
+
+    # لو الفترة شهور كاملة بنجاوب من خلايا مكعب الجلسة مباشرة،
+    # ولو فلتر بالأيام بنبني مكعب من صفقات الفترة بس (الشهر أصغر وحدة في المكعب)
+    if covers_whole_months(start_date, end_date):
+        months = pd.period_range(start_date, end_date, freq="M").astype(str)
+        cube = journal_cube[journal_cube["Month"].isin(months)]
+    else:
+        cube = build_performance_cube(filtered)
+
     st.subheader("🏷️ Performance by Ticker Symbol")
-    perf = filtered.groupby("Ticker Symbol")["Net P&L"].sum().reset_index().sort_values(by="Net P&L", ascending=False)
+    perf = query_cube(cube, ["Ticker Symbol"]).rename(columns={"Total_PnL": "Net P&L"})
+    perf = perf[["Ticker Symbol", "Net P&L"]].sort_values(by="Net P&L", ascending=False)
     fig_bar = px.bar(perf, x="Ticker Symbol", y="Net P&L", title="Net P&L per Ticker")
     st.plotly_chart(fig_bar)
 
@@ -589,18 +855,16 @@ def dashboard_page():
     st.plotly_chart(fig_pie)
 
     # ✅ Performance by Strategy
-    strategy_stats, fig_strategy = generate_strategy_performance(filtered)
-    if strategy_stats is not None:
-        st.subheader("📚 Performance by Strategy")
-        st.plotly_chart(fig_strategy)
-        st.dataframe(strategy_stats)
+    strategy_stats, fig_strategy = generate_strategy_performance(cube)
+    st.subheader("📚 Performance by Strategy")
+    st.plotly_chart(fig_strategy)
+    st.dataframe(strategy_stats)
 
     # ✅ Monthly Performance
-    monthly_stats, fig_monthly = generate_monthly_performance(filtered)
-    if monthly_stats is not None:
-        st.subheader("📆 Monthly Performance")
-        st.plotly_chart(fig_monthly)
-        st.dataframe(monthly_stats)
+    monthly_stats, fig_monthly = generate_monthly_performance(cube)
+    st.subheader("📆 Monthly Performance")
+    st.plotly_chart(fig_monthly)
+    st.dataframe(monthly_stats)
 
     summary = {
         "Total Trades": total_trades,
@@ -624,24 +888,237 @@ def dashboard_page():
 
 
 
-def settings_page():
-    st.header("⚙️ Settings — App Configuration")
-    st.write("Here you can set the default values the app will use for all calculations ⬇️")
+# صفحة التحليل التفصيلي (Drill-Down)
+def analytics_cube_page():
+    st.header("🧊 Drill-Down Analytics")
+    client = connect_gsheet()
+
+    if "username" not in st.session_state:
+        return
+
+    user = st.session_state["username"]
+    try:
+        sheet = client.open("Trading_Journal_Master").worksheet(user)
+    except gspread.exceptions.WorksheetNotFound:
+        st.warning("⚠️ No data found for this user.")
+        return
+
+    cube = get_performance_cube(user, lambda: pd.DataFrame(sheet.get_all_records()))
+    if cube.empty:
+        st.warning("⚠️ No trades recorded yet.")
+        return
+
+    if st.button("🔄 Refresh Data"):
+        st.session_state.pop(f"perf_cube_{user}", None)
+        st.rerun()
 
-    commission_per_share = st.number_input("Commission Per Share ($)", value=st.session_state.get("commission_per_share", 0.02), step=0.001)
-    st.session_state["commission_per_share"] = commission_per_share
+    # الفلاتر على أي بُعد
+    st.markdown("### 🔎 Filters")
+    filters = {}
+    filter_cols = st.columns(len(CUBE_DIMENSIONS))
+    for col, dim in zip(filter_cols, CUBE_DIMENSIONS):
+        with col:
+            filters[dim] = st.multiselect(dim, sorted(cube[dim].unique()), key=f"cube_filter_{dim}")
+
+    # اختيار أبعاد الجدول المحوري
+    st.markdown("### 🧭 Pivot")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        row_dim = st.selectbox("Rows", CUBE_DIMENSIONS, index=1)
+    with col2:
+        col_dim = st.selectbox("Columns", ["None"] + [d for d in CUBE_DIMENSIONS if d != row_dim])
+    with col3:
+        measure = st.selectbox("Measure", ["Total_PnL", "Trades", "WinRate", "Avg_R"])
 
-    min_commission = st.number_input("Minimum Total Commission (Buy + Sell) $", value=st.session_state.get("min_commission", 3.98), step=0.01)
-    st.session_state["min_commission"] = min_commission
+    if col_dim == "None":
+        stats = query_cube(cube, [row_dim], filters)
+        if stats.empty:
+            st.warning("⚠️ No trades match the selected filters.")
+            return
+        fig = px.bar(stats, x=row_dim, y=measure, hover_data=["Trades", "WinRate", "Avg_R"], title=f"{measure} by {row_dim}")
+        st.plotly_chart(fig)
+        st.dataframe(stats[[row_dim, "Total_PnL", "Trades", "WinRate", "Avg_R"]], use_container_width=True)
+    else:
+        stats = query_cube(cube, [row_dim, col_dim], filters)
+        if stats.empty:
+            st.warning("⚠️ No trades match the selected filters.")
+            return
+        pivot = stats.pivot(index=row_dim, columns=col_dim, values=measure)
+        fig = px.imshow(pivot, text_auto=".2f", aspect="auto", title=f"{measure}: {row_dim} × {col_dim}")
+        st.plotly_chart(fig)
+        st.dataframe(pivot, use_container_width=True)
+
+
+# لوحة ترتيب المستخدمين (للأدمن فقط)
+LEADERBOARD_CACHE_TTL = 300
+LEADERBOARD_BATCH_SIZE = 50
+LEADERBOARD_MAX_WORKERS = 8
+LEADERBOARD_METRICS = ["Total_PnL", "WinRate", "Avg_R", "Max_Drawdown", "Trades"]
+
+def is_admin(user):
+    admins = st.secrets.get("admin_users", [])
+    if isinstance(admins, str):
+        admins = [admins]
+    return user in admins
+
+# كاش KPIs المستخدمين على السيرفر، مشترك بين كل جلسات الأدمن
+@st.cache_resource
+def leaderboard_cache():
+    return {"lock": threading.Lock(), "entries": {}}
+
+# جلب جورنالات المستخدمين على دفعات (batchGet) بالتوازي
+def fetch_journals(spreadsheet, users):
+    def fetch(batch):
+        ranges = ["'" + user.replace("'", "''") + "'" for user in batch]
+        response = spreadsheet.values_batch_get(ranges, params={"valueRenderOption": "UNFORMATTED_VALUE"})
+        return zip(batch, response.get("valueRanges", []))
+
+    batches = [users[i:i + LEADERBOARD_BATCH_SIZE] for i in range(0, len(users), LEADERBOARD_BATCH_SIZE)]
+    journals = {}
+    with ThreadPoolExecutor(max_workers=LEADERBOARD_MAX_WORKERS) as pool:
+        for results in pool.map(fetch, batches):
+            for user, value_range in results:
+                rows = value_range.get("values", [])
+                if len(rows) < 2:
+                    continue
+                width = len(rows[0])
+                journals[user] = pd.DataFrame([row[:width] + [""] * (width - len(row)) for row in rows[1:]], columns=rows[0])
+    return journals
+
+def compute_user_kpis(journals):
+    if not journals:
+        return pd.DataFrame(columns=LEADERBOARD_METRICS)
+
+    trades = pd.concat([df.assign(User=user) for user, df in journals.items()], ignore_index=True)
+    trades["Net P&L"] = pd.to_numeric(trades["Net P&L"], errors="coerce").fillna(0.0)
+    trades["R Multiple"] = pd.to_numeric(trades["R Multiple"], errors="coerce")
+    trades["Win"] = trades["Net P&L"] > 0
+    trades["Equity"] = trades.groupby("User")["Net P&L"].cumsum()
+    trades["Drawdown"] = trades["Equity"] - trades.groupby("User")["Equity"].cummax().clip(lower=0)
+
+    kpis = trades.groupby("User").agg(
+        Total_PnL=("Net P&L", "sum"),
+        WinRate=("Win", "mean"),
+        Avg_R=("R Multiple", "mean"),
+        Max_Drawdown=("Drawdown", "min"),
+        Trades=("Net P&L", "size"),
+    )
+    kpis["WinRate"] *= 100
+    return kpis
 
-    default_risk_pct = st.number_input("Default Risk % per Trade", value=st.session_state.get("default_risk_pct", 2.0), step=0.1)
-    st.session_state["default_risk_pct"] = default_risk_pct
+# KPIs لكل المستخدمين مع إعادة استخدام القيم الحديثة من الكاش
+def load_leaderboard():
+    client = connect_gsheet()
+    users = [str(u["username"]) for u in client.open("Trading_Users_DB").worksheet("Users").get_all_records()]
+    spreadsheet = client.open("Trading_Journal_Master")
+    journal_titles = {ws.title for ws in spreadsheet.worksheets()}
+    users = [u for u in users if u in journal_titles]
+
+    cache = leaderboard_cache()
+    with cache["lock"]:
+        entries = cache["entries"]
+        now = time.time()
+        stale = [u for u in users if u not in entries or now - entries[u][0] > LEADERBOARD_CACHE_TTL]
+        if stale:
+            fresh = compute_user_kpis(fetch_journals(spreadsheet, stale)).to_dict("index")
+            for user in stale:
+                entries[user] = (now, fresh.get(user))
+        rows = {u: entries[u][1] for u in users if entries[u][1] is not None}
+
+    board = pd.DataFrame.from_dict(rows, orient="index", columns=LEADERBOARD_METRICS)
+    board.index.name = "User"
+    return board.reset_index()
+
+def admin_leaderboard_page():
+    st.header("🏆 Admin Leaderboard")
+
+    if not is_admin(st.session_state.get("username")):
+        st.error("⛔ This page is available to admins only.")
+        return
 
-    cash_buffer_pct = st.number_input("Cash Buffer % (Reserve from account balance)", value=st.session_state.get("cash_buffer_pct", 1.0), step=0.1)
-    st.session_state["cash_buffer_pct"] = cash_buffer_pct
+    if st.button("🔄 Refresh All Users"):
+        cache = leaderboard_cache()
+        with cache["lock"]:
+            cache["entries"].clear()
 
-    if st.button("✅ Save Settings"):
-        st.success("Settings saved successfully! 🎯")
+    board = load_leaderboard()
+    if board.empty:
+        st.warning("⚠️ No trades recorded by any user yet.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        rank_by = st.selectbox("Rank By", LEADERBOARD_METRICS)
+    with col2:
+        min_trades = st.number_input("Minimum Trades", min_value=0, value=0, step=1)
+
+    board = board[board["Trades"] >= min_trades].copy()
+    if board.empty:
+        st.warning("⚠️ No users match the selected minimum trades.")
+        return
+
+    # المستخدمين اللي ملهمش قيمة للمقياس (مثلاً مفيش R Multiple) بييجوا في الآخر
+    board["Rank"] = board[rank_by].rank(ascending=False, method="min", na_option="bottom").astype(int)
+    board = board.sort_values("Rank")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Users", len(board))
+    with col2:
+        st.metric("Total Trades", int(board["Trades"].sum()))
+    with col3:
+        st.metric("Combined Net P&L", f"${board['Total_PnL'].sum():.2f}")
+
+    fig = px.bar(board.head(20), x="User", y=rank_by, hover_data=LEADERBOARD_METRICS, title=f"Top 20 Users by {rank_by}")
+    st.plotly_chart(fig)
+    st.dataframe(board[["Rank", "User"] + LEADERBOARD_METRICS].reset_index(drop=True), use_container_width=True)
+
+
+def settings_page():
+    st.header("⚙️ Settings — App Configuration")
+    st.write("Here you can set the default values the app will use for all calculations ⬇️")
+
+    user = st.session_state["username"]
+    settings = load_user_settings(user)
+    profiles = settings["profiles"]
+    profile_names = list(profiles)
+    selected = st.selectbox("Risk Profile", profile_names, index=profile_names.index(settings["active"]))
+    values = profiles[selected]
+
+    # الفورم بيمنع إعادة التشغيل مع كل تغيير، والحفظ بيحصل مرة واحدة عند الضغط
+    with st.form("settings_form"):
+        commission_per_share = st.number_input("Commission Per Share ($)", value=float(values["commission_per_share"]), step=0.001)
+        min_commission = st.number_input("Minimum Total Commission (Buy + Sell) $", value=float(values["min_commission"]), step=0.01)
+        default_risk_pct = st.number_input("Default Risk % per Trade", value=float(values["default_risk_pct"]), step=0.1)
+        cash_buffer_pct = st.number_input("Cash Buffer % (Reserve from account balance)", value=float(values["cash_buffer_pct"]), step=0.1)
+        make_active = st.checkbox("Use this profile by default on the Risk Management page", value=selected == settings["active"])
+        submitted = st.form_submit_button("✅ Save Settings")
+
+    if submitted:
+        profiles[selected] = {
+            "commission_per_share": commission_per_share,
+            "min_commission": min_commission,
+            "default_risk_pct": default_risk_pct,
+            "cash_buffer_pct": cash_buffer_pct,
+        }
+        if make_active:
+            settings["active"] = selected
+        if save_user_settings(user, settings):
+            st.success("Settings saved successfully! 🎯")
+        else:
+            st.info("No changes to save.")
+
+    with st.expander("➕ New Risk Profile"):
+        new_profile = st.text_input("Profile Name").strip()
+        if st.button("Create Profile"):
+            if not new_profile:
+                st.warning("Please enter a profile name.")
+            elif new_profile in profiles:
+                st.warning("A profile with this name already exists!")
+            else:
+                profiles[new_profile] = dict(profiles[selected])
+                save_user_settings(user, settings)
+                st.rerun()
 
 # صفحة التوثيق
 def documentation_page():
@@ -668,7 +1145,9 @@ def documentation_page():
     st.write("""
     - View and filter all your saved trades by ticker and date range.
     - Export your trades as a PDF.
+    - Edit a saved trade in place — risk, Net P&L and R Multiple are recalculated.
     - Delete unwanted trades with confirmation prompts.
+    - Changes made from another tab or device are never overwritten; conflicting edits are reported instead.
     """)
 
     st.subheader("4️⃣ Dashboard Page")
@@ -679,9 +1158,18 @@ def documentation_page():
     - Export a full dashboard summary (with charts) as a PDF.
     """)
 
+    st.subheader("5️⃣ Drill-Down Analytics Page")
+    st.write("""
+    - Slice your performance by month, strategy, ticker and indicator.
+    - Filter on any combination of these and pivot any two against each other.
+    - Choose the measure: Net P&L, number of trades, win rate or average R.
+    """)
+
     st.subheader("⚙️ Settings Page")
     st.write("""
     - Preconfigure all default values on the Risk Management page to streamline the process and save time.
+    - Keep several named risk profiles and pick which one is used by default.
+    - Your settings are saved to your account and loaded automatically next time you log in.
     """)
 
     st.subheader("💡 Key Definitions")
@@ -707,7 +1195,7 @@ def documentation_page():
 
 # التطبيق الأساسي main
 def main():
-    set_dark_theme()
+    inject_stylesheet()
     if "username" not in st.session_state:
         login_signup()
     else:
@@ -722,7 +1210,10 @@ def main():
                 st.sidebar.warning(f"⚠️ Attention: You have {len(low_r_trades)} trades with R < 1.0")
         except:
             pass
-        st.sidebar.image("logo.png", width=50)
+        st.sidebar.markdown(
+            f"<div class='sidebar-logo'><img src='{static_asset_url('logo.png')}' alt='Logo'></div>",
+            unsafe_allow_html=True
+        )
         st.sidebar.title("Trading Risk Management & Journaling")
         st.sidebar.title(f"Welcome, {user}")
 
@@ -734,26 +1225,16 @@ def main():
         st.sidebar.info(f"💡 {today_tip}")
 
 
-        page = st.sidebar.radio("Go to:", [
-            "Risk Management", "Add Trade", "Trade Journal", "Dashboard", "Settings", "Documentation"
-        ])
+        pages = [
+            "Risk Management", "Add Trade", "Trade Journal", "Dashboard", "Drill-Down Analytics", "Settings", "Documentation"
+        ]
+        if is_admin(user):
+            pages.append("Admin Leaderboard")
+        page = st.sidebar.radio("Go to:", pages)
 
 
         st.sidebar.markdown(
-            '''
-            <style>
-            .sidebar-footer {
-                position: fixed;
-                bottom: 20px;
-                text-align: left;
-                font-size: 16px;
-                color: white;
-            }
-            </style>
-            <div class="sidebar-footer">
-                Designed & Developed by <strong>Ahmed Gamal</strong>
-            </div>
-            ''',
+            '<div class="sidebar-footer">Designed & Developed by <strong>Ahmed Gamal</strong></div>',
             unsafe_allow_html=True
         )
 
@@ -761,6 +1242,7 @@ def main():
         if st.sidebar.button("🚪 Logout", key="logout"):
             if "username" in st.session_state:
                 del st.session_state["username"]
+                st.session_state.pop("user_settings", None)
                 st.rerun()
 
         # الانتقال بين الصفحات
@@ -772,10 +1254,14 @@ def main():
             trade_journal_page()
         elif page == "Dashboard":
             dashboard_page()
+        elif page == "Drill-Down Analytics":
+            analytics_cube_page()
         elif page == "Settings":
             settings_page()
         elif page == "Documentation":
             documentation_page()
+        elif page == "Admin Leaderboard":
+            admin_leaderboard_page()
         
 
 if __name__ == "__main__":
@@ -0,0 +1,70 @@
+"""Benchmark the dashboard equity curve before and after downsampling.
+
+Run from the repository root:
+
+    python scripts/bench_equity_curve.py
+
+For each journal size it prints the Plotly JSON payload sent to the browser,
+the time to build and serialize the figure, and (when kaleido can start a
+browser) the time Plotly.js takes to render it to a PNG.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app import equity_curve_figure  # noqa: E402
+
+SIZES = [1_000, 10_000, 50_000, 200_000]
+REPEATS = 3
+
+
+def make_trades(n, seed=0):
+    rng = np.random.default_rng(seed)
+    trades = pd.DataFrame({
+        "Entry Time": pd.date_range("2020-01-01", periods=n, freq="h"),
+        "Net P&L": rng.normal(0.5, 20, n),
+    })
+    trades["Cumulative PnL"] = trades["Net P&L"].cumsum()
+    return trades
+
+
+def full_figure(trades):
+    return px.line(trades, x="Entry Time", y="Cumulative PnL", title="Cumulative Net P&L Over Time")
+
+
+def measure(build, trades):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fig = build(trades)
+        payload = fig.to_json()
+        timings.append((time.perf_counter() - start) * 1000)
+    build_ms = min(timings)
+
+    try:
+        start = time.perf_counter()
+        pio.to_image(fig, format="png", width=1000, height=500)
+        render_ms = f"{(time.perf_counter() - start) * 1000:.0f} ms"
+    except Exception:
+        render_ms = "n/a"
+
+    return len(payload), build_ms, render_ms
+
+
+def main():
+    print(f"{'trades':>8}  {'chart':<6} {'payload':>10} {'build+json':>11} {'render':>9}")
+    for n in SIZES:
+        trades = make_trades(n)
+        for label, build in (("before", full_figure), ("after", equity_curve_figure)):
+            size, build_ms, render_ms = measure(build, trades)
+            print(f"{n:>8}  {label:<6} {size / 1024:>7.0f} KB {build_ms:>8.0f} ms {render_ms:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Stress the journal write path with many concurrent writers.
+
+Run from the repository root:
+
+    python scripts/stress_journal_writes.py
+
+The app's add / edit / delete functions run against LocalWorksheet, an
+in-memory stand-in for a gspread worksheet. Every call is one atomic request
+with random latency, like the Sheets API. Two scenarios are checked:
+
+* same server   - writers share the app's per-user lock (many tabs, one
+                  Streamlit process) and mix adds, edits and deletes.
+* many servers  - every writer gets its own lock (separate processes), adds only.
+
+Each scenario fails loudly if a trade is lost or a Trade ID is duplicated.
+"""
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import gspread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+USER = "stress"
+
+
+class LocalWorksheet:
+    def __init__(self, header):
+        self.rows = [[str(v) for v in header]]
+        self.lock = threading.Lock()
+
+    def _latency(self):
+        time.sleep(random.uniform(0, 0.002))
+
+    def col_values(self, col):
+        self._latency()
+        with self.lock:
+            return [row[col - 1] if len(row) >= col else "" for row in self.rows]
+
+    def row_values(self, row):
+        self._latency()
+        with self.lock:
+            return list(self.rows[row - 1])
+
+    def append_row(self, values):
+        self._latency()
+        with self.lock:
+            self.rows.append([str(v) for v in values])
+            row = len(self.rows)
+        return {"updates": {"updatedRange": f"'{USER}'!A{row}:Q{row}"}}
+
+    def delete_rows(self, row):
+        self._latency()
+        with self.lock:
+            del self.rows[row - 1]
+
+    def update(self, range_name, values):
+        self._latency()
+        row = int(range_name.lstrip("A"))
+        with self.lock:
+            cells = [str(v) for v in values[0]]
+            self.rows[row - 1][:len(cells)] = cells
+
+
+def trade_row(note):
+    return ["TEST", "Long", 100, "2025-01-01 10:00:00", 110, "2025-01-01 11:00:00",
+            1, 10, 90, 120, 1, 0, 10, "RSI", "Breakout", note]
+
+
+def writer(sheet, worker, trades, mixed):
+    rnd = random.Random(worker)
+    expected, mine = {}, {}
+    for i in range(trades):
+        note = f"w{worker}-{i}"
+        trade_id = app.append_trade_to_gsheet(USER, sheet, trade_row(note))
+        expected[note] = note
+        mine[note] = trade_id
+        if not mixed:
+            continue
+
+        roll = rnd.random()
+        if roll < 0.2:
+            victim = rnd.choice(list(mine))
+            assert app.delete_trade_from_gsheet(USER, sheet, mine.pop(victim))
+            del expected[victim]
+        elif roll < 0.45:
+            target = rnd.choice(list(mine))
+            row = [mine[target]] + trade_row(expected[target])
+            original = dict(zip(app.JOURNAL_HEADERS, gspread.utils.numericise_all([str(v) for v in row])))
+            updated = row[:-1] + [target + "-edited"]
+            app.update_trade_in_gsheet(USER, sheet, original, updated)
+            expected[target] = target + "-edited"
+    return expected
+
+
+def run(name, writers, trades, mixed):
+    sheet = LocalWorksheet(app.JOURNAL_HEADERS)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as pool:
+        results = list(pool.map(lambda w: writer(sheet, w, trades, mixed), range(writers)))
+    elapsed = time.perf_counter() - start
+
+    expected = {note for result in results for note in result.values()}
+    rows = sheet.rows[1:]
+    notes = [row[-1] for row in rows]
+    ids = [row[0] for row in rows]
+    lost = expected - set(notes)
+    duplicates = len(ids) - len(set(ids))
+    print(f"{name:<13} writers={writers:<3} rows={len(rows):<5} lost={len(lost)} "
+          f"unexpected={len(rows) - len(expected)} duplicate_ids={duplicates} ({elapsed:.1f}s)")
+    assert not lost and len(rows) == len(expected) and not duplicates
+
+
+def main():
+    run("same server", writers=32, trades=25, mixed=True)
+    run("same server", writers=64, trades=20, mixed=True)
+
+    # سيرفرات منفصلة: كل كاتب بقفل خاص بيه، فالقفل مش بيحمي حاجة
+    app.journal_lock = lambda user: threading.Lock()
+    run("many servers", writers=32, trades=25, mixed=False)
+
+
+if __name__ == "__main__":
+    main()